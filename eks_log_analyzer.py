@@ -4,47 +4,437 @@ EKS Log Analyzer with AWS Bedrock Integration
 Analyzes EKS cluster logs using natural language queries powered by AWS Bedrock
 """
 
-import boto3
+import argparse
+import hashlib
+import heapq
 import json
 import os
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from typing import List, Dict, Optional
+import re
+import sys
+import textwrap
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Tuple
 
-# Load environment variables
-load_dotenv()
+# Optional faster JSON codecs for Bedrock payloads; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import jiter
+except ImportError:
+    jiter = None
+
+# Optional tokenizer for sizing the log context; a character estimate is used without it
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Optional shared cache for Bedrock answers; an in-process dict is used without it
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Formatted log contexts are persisted here between runs when --disk-cache is given
+CACHE_DIR = Path.home() / '.cache' / 'eks_log_analyzer'
+
+# Formatted log contexts are reused for the same request within this window, then pruned (seconds)
+FORMAT_CACHE_WINDOW = 300
+
+# Bump whenever format_logs_for_bedrock output changes so old cache files are not reused
+FORMAT_VERSION = 6
+
+# Number of formatted log contexts kept in memory
+FORMAT_CACHE_SIZE = 16
+
+# Tokens kept free in the context window for the prompt preamble and the answer
+CONTEXT_TOKEN_RESERVE = 4000
+
+# Tokens kept free for the current question plus earlier turns; older turns are dropped to fit
+CONVERSATION_TOKEN_BUDGET = 20000
+
+# Conservative characters-per-token estimate when tiktoken is missing (JSON audit logs are dense)
+CHARS_PER_TOKEN = 2.5
+
+# IDs, timestamps and epoch numbers that make otherwise identical log lines differ,
+# including the klog header (level, date, time, thread id) on control plane lines
+_VOLATILE_RE = re.compile(
+    r'^[IWEF]\d{4} \d{2}:\d{2}:\d{2}\.\d+\s+\d+'
+    r'|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b'
+    r'|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?'
+    r'|\b\d{10,}\b',
+    re.IGNORECASE
+)
+
+# CloudWatch stream name prefixes for each EKS control plane log type
+LOG_STREAM_PREFIXES = {
+    'api': 'kube-apiserver-',
+    'audit': 'kube-apiserver-audit-',
+    'authenticator': 'authenticator-',
+    'controllerManager': 'kube-controller-manager-',
+    'scheduler': 'kube-scheduler-',
+}
+
+# Hard limit on CloudWatch pages read per fetch task, so busy streams can't cause long scans
+MAX_FETCH_PAGES = 10
+
+# First time slice searched backwards from the window end with a filter pattern (ms);
+# each older slice doubles in length
+FILTER_SLICE_MS = 5 * 60_000
+
+# Most recently active log streams used per log type
+STREAMS_PER_TYPE = 5
+
+# lastEventTimestamp is only eventually consistent, so streams are scanned this far past
+# the window start before the listing stops (ms)
+STREAM_TIMESTAMP_SLACK_MS = 3_600_000
+
+
+def _stream_prefix(log_type: str) -> str:
+    """CloudWatch stream name prefix for an EKS log type"""
+    return LOG_STREAM_PREFIXES.get(log_type, log_type)
+
+
+def _stream_matches(stream_name: str, log_type: str) -> bool:
+    """Whether a stream belongs to a log type ('kube-apiserver-' also prefixes audit streams)"""
+    if not stream_name.startswith(_stream_prefix(log_type)):
+        return False
+    return log_type != 'api' or not stream_name.startswith(LOG_STREAM_PREFIXES['audit'])
+
+
+# Clusters described in the background at startup, before the user picks one
+PREFETCH_CLUSTERS = 5
+
+# Prefetched cluster descriptions and stream listings stay valid this long, so they are still
+# cached after the user has read the menu and answered the prompts (seconds)
+PREFETCH_TTL = 300
+
+# How long to wait for a CloudWatch Logs Insights query before giving up (seconds)
+INSIGHTS_QUERY_TIMEOUT = 60
+
+# Maximum Insights result rows passed to Bedrock
+INSIGHTS_MAX_ROWS = 200
+
+# Cached Bedrock answers are fresh for this long, then only served if Bedrock fails
+RESPONSE_CACHE_TTL = 3600
+RESPONSE_CACHE_STALE_TTL = 86400
+
+
+# Static terminal banners, written with a single sys.stdout.write each
+_BANNER_RULE = "=" * 80
+
+_MAIN_BANNER = textwrap.dedent(f"""
+    {_BANNER_RULE}
+    🚀 EKS LOG ANALYZER WITH AWS BEDROCK
+    {_BANNER_RULE}
+""")
+
+_MODE_MENU = textwrap.dedent("""
+    📋 What would you like to do?
+       1. Analyze EKS cluster logs (retrieve and analyze actual logs)
+       2. Ask general EKS questions (knowledge assistant)
+       3. Show my cluster information (quick view)
+""")
+
+_ENABLE_LOGGING_TMPL = textwrap.dedent("""
+    📋 To enable EKS cluster logging:
+
+    1. Using AWS Console:
+       - Go to Amazon EKS Console
+       - Select cluster: {cluster}
+       - Go to 'Observability' tab
+       - Click 'Manage logging'
+       - Enable desired log types (api, audit, authenticator, controllerManager, scheduler)
+       - Click 'Save changes'
+
+    2. Using AWS CLI:
+       aws eks update-cluster-config \\
+         --region {region} \\
+         --name {cluster} \\
+         --logging '{{
+           "clusterLogging":[{{
+             "types":["api","audit","authenticator","controllerManager","scheduler"],
+             "enabled":true
+           }}]
+         }}'
+
+    ⏰ Note: After enabling, wait 5-10 minutes for logs to start appearing.
+""")
+
+_GENERAL_MODE_BANNER = textwrap.dedent(f"""
+    {_BANNER_RULE}
+    🤖 EKS KNOWLEDGE ASSISTANT
+    {_BANNER_RULE}
+
+    Ask me anything about EKS and Kubernetes!
+
+    Example questions:
+      • How do I troubleshoot pod crashes in EKS?
+      • What's the difference between EKS node groups and Fargate?
+      • How do I set up IRSA (IAM Roles for Service Accounts)?
+      • What are EKS best practices for security?
+      • How do I configure cluster autoscaling?
+      • Explain EKS networking and VPC CNI
+      • How do I upgrade my EKS cluster version?
+
+    Type 'exit' or 'quit' to end the session.
+
+""")
+
+_ANALYSIS_BANNER = textwrap.dedent(f"""
+    {_BANNER_RULE}
+    🤖 INTERACTIVE EKS LOG ANALYSIS
+    {_BANNER_RULE}
+
+    You can now ask questions about your EKS cluster logs!
+
+    Example questions:
+      • What API requests do you see?
+      • Show me authentication failures
+      • Which users accessed the cluster?
+      • Are there any errors or warnings?
+      • What pods were created or deleted?
+      • Show me suspicious activities
+      • How many requests per user? (runs a CloudWatch Logs Insights query)
+
+    Type 'exit' or 'quit' to end the session.
+
+""")
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize a request body, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """Parse a response body, using jiter with key caching when available"""
+    if jiter is not None:
+        return jiter.from_json(data, cache_mode='keys')
+    return json.loads(data)
+
+
+# Markdown code fence around a model-written query, including a language tag such as ```sql
+_CODE_FENCE_RE = re.compile(r'^```(?:[^\n]*\n)?|\n?```$')
+
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a Markdown code fence the model wrapped around its output"""
+    return _CODE_FENCE_RE.sub('', text.strip()).strip()
+
+
+def _print_streamed(text: str):
+    """Print a streamed chunk of a Bedrock answer as soon as it arrives"""
+    print(text, end='', flush=True)
+
+
+_token_encoding = None
+
+
+def _count_tokens(text: str) -> int:
+    """Count tokens with tiktoken's cl100k_base (an approximation for Claude), or estimate"""
+    global _token_encoding
+    if tiktoken is None:
+        return int(len(text) / CHARS_PER_TOKEN) + 1
+    if _token_encoding is None:
+        _token_encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_token_encoding.encode(text))
+
+
+@dataclass
+class LogEvents:
+    """Retrieved log events stored as parallel lists (one index per event)"""
+    timestamps: List[int] = field(default_factory=list)
+    messages: List[str] = field(default_factory=list)
+    log_types: List[str] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def extend(self, other: 'LogEvents'):
+        """Append all events from another batch"""
+        self.timestamps.extend(other.timestamps)
+        self.messages.extend(other.messages)
+        self.log_types.extend(other.log_types)
 
 
 class EKSLogAnalyzer:
     """Main class for analyzing EKS cluster logs using AWS Bedrock"""
     
-    def __init__(self, region_name: str = None):
+    # Questions about the user's own AWS resources, answered with live cluster data
+    _INTENT_RE = re.compile(
+        r'\b(?:my (?:clusters?|eks)|(?:how many|list|number of) clusters?)\b',
+        re.IGNORECASE
+    )
+    
+    # Aggregation questions, answered with a CloudWatch Logs Insights query
+    _AGGREGATION_RE = re.compile(
+        r'\b(?:how many|count|top \d+|most (?:frequent|common|active)|breakdown|'
+        r'per (?:user|hour|namespace|resource)|group(?:ed)? by)\b',
+        re.IGNORECASE
+    )
+    
+    def __init__(self, region_name: str = None, use_cache: bool = True, prefetch: bool = False,
+                 disk_cache: bool = False):
         """Initialize the EKS Log Analyzer"""
         self.region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
         self.model_id = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
         self.max_log_entries = int(os.getenv('MAX_LOG_ENTRIES', 1000))
+        self.context_tokens = int(os.getenv('BEDROCK_CONTEXT_TOKENS', 150000))
+        self.prompt_caching = os.getenv('BEDROCK_PROMPT_CACHING', 'false').lower() == 'true'
+        self.use_cache = use_cache
+        self.disk_cache = use_cache and disk_cache
+        
+        # AWS clients are created on first use from one shared session (not thread-safe),
+        # one per service name
+        self._session = None
+        self._clients: Dict[str, object] = {}
+        self._client_lock = threading.Lock()
+        
+        # describe_cluster responses keyed by cluster name: (expires_at, cluster)
+        self._cluster_cache: Dict[str, Tuple[float, Dict]] = {}
+        
+        # Recent log streams keyed by (cluster name, log type):
+        # (expires_at, since_timestamp, [(stream name, last event timestamp)])
+        self._stream_cache: Dict[Tuple[str, str], Tuple[float, int, List[Tuple[str, int]]]] = {}
+        
+        # In-flight background stream listings keyed by (cluster name, log type)
+        self._stream_futures: Dict[Tuple[str, str], Future] = {}
+        
+        # Formatted log contexts, least recently used first
+        self._format_cache: OrderedDict = OrderedDict()
         
-        # Initialize AWS clients
-        self.eks_client = boto3.client('eks', region_name=self.region_name)
-        self.logs_client = boto3.client('logs', region_name=self.region_name)
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name=self.region_name)
+        # Converse API turn history for the current log context
+        self._conversation: List[Dict] = []
+        self._conversation_context: Optional[str] = None
+        
+        # Bedrock answers keyed by prompt hash: Redis when REDIS_URL is set, else in memory
+        self._local_responses: Dict[str, Tuple[float, str]] = {}
+        self._response_cache = None
+        redis_url = os.getenv('REDIS_URL')
+        if use_cache and redis_url:
+            if redis is None:
+                print("⚠️  REDIS_URL is set but the redis package is not installed; using in-memory cache")
+            else:
+                self._response_cache = redis.Redis.from_url(redis_url)
+        
+        # Optionally fetch cluster metadata in the background while the user reads the menu
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=4)
+        self._clusters_future = self._prefetch_executor.submit(self._prefetch_clusters) if prefetch else None
         
         print(f"✅ Initialized EKS Log Analyzer in region: {self.region_name}")
     
+    def _get_client(self, service_name: str):
+        """Return the shared AWS client for a service, creating it on first use"""
+        with self._client_lock:
+            # Checked under the lock so concurrent first use still builds a single client
+            client = self._clients.get(service_name)
+            if client is not None:
+                return client
+            
+            import boto3
+            from botocore.config import Config
+            
+            # One session so credentials are resolved once; the larger connection
+            # pool lets parallel fetches run without waiting on sockets
+            if self._session is None:
+                self._session = boto3.session.Session(region_name=self.region_name)
+            client_config = Config(
+                max_pool_connections=32,
+                tcp_keepalive=True,
+                retries={'mode': 'adaptive', 'max_attempts': 5}
+            )
+            client = self._clients[service_name] = self._session.client(service_name, config=client_config)
+            return client
+    
+    @property
+    def eks_client(self):
+        """EKS client, created on first use"""
+        return self._get_client('eks')
+    
+    @property
+    def logs_client(self):
+        """CloudWatch Logs client, created on first use"""
+        return self._get_client('logs')
+    
+    @property
+    def bedrock_client(self):
+        """Bedrock Runtime client, created on first use"""
+        return self._get_client('bedrock-runtime')
+    
     def list_clusters(self) -> List[str]:
         """List all EKS clusters in the region"""
         try:
-            response = self.eks_client.list_clusters()
-            clusters = response.get('clusters', [])
+            paginator = self.eks_client.get_paginator('list_clusters')
+            clusters = []
+            for page in paginator.paginate():
+                clusters.extend(page.get('clusters', []))
             return clusters
         except Exception as e:
             print(f"❌ Error listing clusters: {str(e)}")
             return []
     
+    def _describe_cluster(self, cluster_name: str, ttl: float = 30) -> Dict:
+        """Describe an EKS cluster, reusing an unexpired cached result and caching new ones for ttl seconds"""
+        cached = self._cluster_cache.get(cluster_name)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        
+        try:
+            cluster = self.eks_client.describe_cluster(name=cluster_name)['cluster']
+        except self.eks_client.exceptions.ResourceNotFoundException:
+            self._cluster_cache.pop(cluster_name, None)
+            raise
+        
+        self._cluster_cache[cluster_name] = (time.monotonic() + ttl, cluster)
+        return cluster
+    
+    def _prefetch_clusters(self) -> List[str]:
+        """List clusters and warm the describe_cluster cache for the first few"""
+        clusters = self.list_clusters()
+        for cluster_name in clusters[:PREFETCH_CLUSTERS]:
+            self._prefetch_executor.submit(self._describe_cluster_quietly, cluster_name)
+        return clusters
+    
+    def _describe_cluster_quietly(self, cluster_name: str):
+        """Warm the describe_cluster cache, leaving errors to the foreground call"""
+        try:
+            self._describe_cluster(cluster_name, ttl=PREFETCH_TTL)
+        except Exception:
+            pass
+    
+    def prefetched_clusters(self) -> List[str]:
+        """Return the cluster list fetched at startup, waiting for it if necessary"""
+        if self._clusters_future is None:
+            return self.list_clusters()
+        return self._clusters_future.result()
+    
+    def close(self):
+        """Stop background prefetching without waiting for in-flight AWS calls"""
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def prefetch_log_streams(self, cluster_name: str, log_types: List[str]):
+        """Look up log streams in the background for get_log_streams to wait on"""
+        for log_type in log_types:
+            self._stream_futures[(cluster_name, log_type)] = self._prefetch_executor.submit(
+                self._list_log_streams, cluster_name, log_type, None, PREFETCH_TTL)
+    
     def check_cluster_exists(self, cluster_name: str) -> bool:
         """Check if an EKS cluster exists"""
         try:
-            self.eks_client.describe_cluster(name=cluster_name)
+            self._describe_cluster(cluster_name)
             print(f"✅ Cluster '{cluster_name}' found!")
             return True
         except self.eks_client.exceptions.ResourceNotFoundException:
@@ -57,8 +447,7 @@ class EKSLogAnalyzer:
     def get_cluster_logging_config(self, cluster_name: str) -> Dict:
         """Get the logging configuration for an EKS cluster"""
         try:
-            response = self.eks_client.describe_cluster(name=cluster_name)
-            logging_config = response['cluster'].get('logging', {})
+            logging_config = self._describe_cluster(cluster_name).get('logging', {})
             return logging_config
         except Exception as e:
             print(f"❌ Error getting logging config: {str(e)}")
@@ -86,48 +475,66 @@ class EKSLogAnalyzer:
     
     def _print_enable_logging_instructions(self, cluster_name: str):
         """Print instructions to enable EKS cluster logging"""
-        print("\n📋 To enable EKS cluster logging:")
-        print("\n1. Using AWS Console:")
-        print("   - Go to Amazon EKS Console")
-        print(f"   - Select cluster: {cluster_name}")
-        print("   - Go to 'Observability' tab")
-        print("   - Click 'Manage logging'")
-        print("   - Enable desired log types (api, audit, authenticator, controllerManager, scheduler)")
-        print("   - Click 'Save changes'")
-        
-        print("\n2. Using AWS CLI:")
-        print(f"   aws eks update-cluster-config \\")
-        print(f"     --region {self.region_name} \\")
-        print(f"     --name {cluster_name} \\")
-        print(f"     --logging '{{")
-        print(f'       "clusterLogging":[{{')
-        print(f'         "types":["api","audit","authenticator","controllerManager","scheduler"],')
-        print(f'         "enabled":true')
-        print(f"       }}]")
-        print(f"     }}'")
-        
-        print("\n⏰ Note: After enabling, wait 5-10 minutes for logs to start appearing.")
+        sys.stdout.write(_ENABLE_LOGGING_TMPL.format(region=self.region_name, cluster=cluster_name))
     
     def get_log_group_name(self, cluster_name: str) -> str:
         """Get the CloudWatch log group name for an EKS cluster"""
         return f"/aws/eks/{cluster_name}/cluster"
     
-    def get_log_streams(self, cluster_name: str, log_type: str) -> List[str]:
-        """Get log streams for a specific log type"""
+    def get_log_streams(self, cluster_name: str, log_type: str, since_timestamp: int = None,
+                        ttl: float = 60) -> List[str]:
+        """Get the most recently active log streams of a type with events since since_timestamp
+        
+        Defaults to the last 24 hours. An unexpired cached listing is reused when it covered
+        at least the same window, after waiting for any prefetch still in flight.
+        """
+        if since_timestamp is None:
+            since_timestamp = int(time.time() * 1000) - 24 * 3_600_000
+        cutoff = since_timestamp - STREAM_TIMESTAMP_SLACK_MS
+        
+        prefetch = self._stream_futures.pop((cluster_name, log_type), None)
+        if prefetch is not None:
+            try:
+                prefetch.result()
+            except Exception:
+                pass
+        
+        cached = self._stream_cache.get((cluster_name, log_type))
+        if cached and time.monotonic() < cached[0] and cached[1] <= since_timestamp:
+            return [name for name, last_event in cached[2] if last_event >= cutoff]
+        
+        return self._list_log_streams(cluster_name, log_type, since_timestamp, ttl)
+    
+    def _list_log_streams(self, cluster_name: str, log_type: str, since_timestamp: int = None,
+                          ttl: float = 60) -> List[str]:
+        """List the most recently active streams of a log type and cache them for ttl seconds"""
         log_group = self.get_log_group_name(cluster_name)
+        if since_timestamp is None:
+            since_timestamp = int(time.time() * 1000) - 24 * 3_600_000
+        cutoff = since_timestamp - STREAM_TIMESTAMP_SLACK_MS
         
         try:
-            # Note: Cannot use orderBy with logStreamNamePrefix, so we get all and sort manually
-            response = self.logs_client.describe_log_streams(
+            # orderBy can't be combined with logStreamNamePrefix, so the whole group is listed
+            # newest first and matched by name until enough streams or the window start is reached
+            paginator = self.logs_client.get_paginator('describe_log_streams')
+            pages = paginator.paginate(
                 logGroupName=log_group,
-                logStreamNamePrefix=log_type,
-                limit=50
+                orderBy='LastEventTime',
+                descending=True
             )
-            streams_data = response.get('logStreams', [])
-            # Sort by last event time (most recent first)
-            sorted_streams = sorted(streams_data, key=lambda x: x.get('lastEventTimestamp', 0), reverse=True)
-            streams = [stream['logStreamName'] for stream in sorted_streams[:5]]
-            return streams
+            found = []
+            # Breaking out of the generator stops further pages from being requested
+            for stream in (stream for page in pages for stream in page.get('logStreams', [])):
+                last_event = stream.get('lastEventTimestamp', 0)
+                if last_event < cutoff:
+                    break
+                if _stream_matches(stream['logStreamName'], log_type):
+                    found.append((stream['logStreamName'], last_event))
+                    if len(found) >= STREAMS_PER_TYPE:
+                        break
+            
+            self._stream_cache[(cluster_name, log_type)] = (time.monotonic() + ttl, since_timestamp, found)
+            return [name for name, _ in found]
         except self.logs_client.exceptions.ResourceNotFoundException:
             print(f"⚠️  Log group not found: {log_group}")
             return []
@@ -135,143 +542,543 @@ class EKSLogAnalyzer:
             print(f"❌ Error getting log streams: {str(e)}")
             return []
     
-    def retrieve_logs(self, cluster_name: str, hours_back: int = 24, log_types: List[str] = None) -> List[Dict]:
-        """Retrieve EKS cluster logs from CloudWatch"""
+    def retrieve_logs(self, cluster_name: str, hours_back: int = 24, log_types: List[str] = None,
+                      filter_pattern: str = None) -> LogEvents:
+        """Retrieve EKS cluster logs from CloudWatch, optionally filtered server-side"""
         log_group = self.get_log_group_name(cluster_name)
         
-        # Calculate time range
-        end_time = datetime.now(datetime.UTC) if hasattr(datetime, 'UTC') else datetime.utcnow()
-        start_time = end_time - timedelta(hours=hours_back)
+        # Calculate time range in epoch milliseconds
+        end_timestamp = int(time.time() * 1000)
+        start_timestamp = end_timestamp - hours_back * 3_600_000
         
-        start_timestamp = int(start_time.timestamp() * 1000)
-        end_timestamp = int(end_time.timestamp() * 1000)
+        start_time = datetime.fromtimestamp(start_timestamp / 1000, tz=timezone.utc)
+        end_time = datetime.fromtimestamp(end_timestamp / 1000, tz=timezone.utc)
+        print(f"\n🔍 Retrieving logs from {start_time.strftime('%Y-%m-%d %H:%M:%S UTC')} to {end_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
         
-        print(f"\n🔍 Retrieving logs from {start_time.strftime('%Y-%m-%d %H:%M:%S')} to {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        all_log_events = []
+        all_log_events = LogEvents()
         
         # If no log types specified, try to get all enabled types
         if not log_types:
             _, enabled_types = self.check_cluster_logging(cluster_name)
             log_types = enabled_types if enabled_types else ['api', 'audit']
         
+        # First fan-out: discover the streams for every log type in parallel
+        streams_by_type = {}
+        with ThreadPoolExecutor(max_workers=len(log_types)) as executor:
+            futures = {
+                executor.submit(self.get_log_streams, cluster_name, log_type,
+                                start_timestamp): log_type
+                for log_type in log_types
+            }
+            for future in as_completed(futures):
+                log_type = futures[future]
+                try:
+                    streams_by_type[log_type] = future.result()
+                except Exception as e:
+                    print(f"   ❌ Error fetching {log_type} logs: {str(e)}")
+                    streams_by_type[log_type] = []
+        
+        if filter_pattern:
+            print(f"   🔎 Using filter pattern: {filter_pattern}")
+        
+        tasks = []
         for log_type in log_types:
-            try:
-                print(f"   📥 Fetching {log_type} logs...")
-                
-                # Get log streams for this type
-                streams = self.get_log_streams(cluster_name, log_type)
-                
-                if not streams:
-                    print(f"   ⚠️  No log streams found for {log_type}")
-                    continue
-                
-                # Fetch logs from each stream
-                for stream in streams[:3]:  # Limit to top 3 streams per type
-                    try:
-                        response = self.logs_client.filter_log_events(
-                            logGroupName=log_group,
-                            logStreamNames=[stream],
-                            startTime=start_timestamp,
-                            endTime=end_timestamp,
-                            limit=self.max_log_entries // len(log_types)
-                        )
-                        
-                        events = response.get('events', [])
-                        for event in events:
-                            event['logType'] = log_type
-                            all_log_events.append(event)
-                        
-                        print(f"      ✓ Retrieved {len(events)} events from {stream}")
-                        
-                    except Exception as e:
-                        print(f"      ⚠️  Error fetching from stream {stream}: {str(e)}")
-                        continue
-                
-            except Exception as e:
-                print(f"   ❌ Error fetching {log_type} logs: {str(e)}")
+            streams = streams_by_type.get(log_type, [])
+            if not streams:
+                print(f"   ⚠️  No log streams found for {log_type}")
                 continue
+            print(f"   📥 Fetching {log_type} logs...")
+            if filter_pattern:
+                # One filtered search across all of this type's streams
+                tasks.append((log_type, streams))
+            else:
+                # Limit to top 3 streams per type
+                tasks.extend((log_type, [stream]) for stream in streams[:3])
+        
+        # Second fan-out: fetch every task in parallel
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(30, len(tasks))) as executor:
+                futures = [
+                    executor.submit(self._fetch_events, log_group, log_type, streams,
+                                    start_timestamp, end_timestamp, filter_pattern)
+                    for log_type, streams in tasks
+                ]
+                for future in as_completed(futures):
+                    all_log_events.extend(future.result())
         
         print(f"\n✅ Total log events retrieved: {len(all_log_events)}")
         return all_log_events
     
-    def format_logs_for_bedrock(self, log_events: List[Dict], hours_back: int) -> str:
+    def _fetch_events(self, log_group: str, log_type: str, streams: List[str],
+                      start_timestamp: int, end_timestamp: int,
+                      filter_pattern: str = None) -> LogEvents:
+        """Fetch up to MAX_LOG_ENTRIES of the newest events, tagged with their log type"""
+        source = streams[0] if len(streams) == 1 else f"{len(streams)} {log_type} streams"
+        
+        try:
+            if filter_pattern:
+                raw_events = self._filter_newest_events(log_group, streams, start_timestamp,
+                                                        end_timestamp, filter_pattern)
+            else:
+                raw_events = self._tail_stream(log_group, streams[0], start_timestamp, end_timestamp)
+            
+            events = LogEvents(
+                timestamps=[event['timestamp'] for event in raw_events],
+                messages=[event.get('message', '') for event in raw_events],
+                log_types=[log_type] * len(raw_events)
+            )
+            print(f"      ✓ Retrieved {len(events)} events from {source}")
+            return events
+            
+        except Exception as e:
+            print(f"      ⚠️  Error fetching from {source}: {str(e)}")
+            return LogEvents()
+    
+    def _tail_stream(self, log_group: str, stream: str,
+                     start_timestamp: int, end_timestamp: int) -> List[Dict]:
+        """Read a stream backwards from the window end until MAX_LOG_ENTRIES events are found"""
+        events = []
+        params = {
+            'logGroupName': log_group,
+            'logStreamName': stream,
+            'startTime': start_timestamp,
+            'endTime': end_timestamp,
+            'startFromHead': False,
+            'limit': min(self.max_log_entries, 10000)
+        }
+        
+        for _ in range(MAX_FETCH_PAGES):
+            response = self.logs_client.get_log_events(**params)
+            events.extend(response.get('events', []))
+            
+            # The same token coming back means the start of the window was reached
+            token = response.get('nextBackwardToken')
+            if len(events) >= self.max_log_entries or not token or token == params.get('nextToken'):
+                break
+            params['nextToken'] = token
+            params['limit'] = min(self.max_log_entries - len(events), 10000)
+        
+        return events
+    
+    def _filter_newest_events(self, log_group: str, streams: List[str], start_timestamp: int,
+                              end_timestamp: int, filter_pattern: str) -> List[Dict]:
+        """Search growing time slices backwards from the window end until MAX_LOG_ENTRIES match
+        
+        FilterLogEvents returns events oldest-first, so walking slices newest-first keeps
+        the most recent matches without reading the whole window.
+        """
+        paginator = self.logs_client.get_paginator('filter_log_events')
+        events = []
+        pages_read = 0
+        slice_end = end_timestamp
+        slice_ms = FILTER_SLICE_MS
+        
+        while slice_end >= start_timestamp and len(events) < self.max_log_entries:
+            slice_start = max(start_timestamp, slice_end - slice_ms)
+            pages = paginator.paginate(
+                logGroupName=log_group,
+                logStreamNames=streams,
+                startTime=slice_start,
+                endTime=slice_end,
+                filterPattern=filter_pattern
+            )
+            for page in pages:
+                events.extend(page.get('events', []))
+                pages_read += 1
+                if pages_read >= MAX_FETCH_PAGES:
+                    break
+            if pages_read >= MAX_FETCH_PAGES:
+                break
+            
+            # endTime is inclusive, so the next slice stops just before this one starts
+            slice_end = slice_start - 1
+            slice_ms *= 2
+        
+        return heapq.nlargest(self.max_log_entries, events, key=itemgetter('timestamp'))
+    
+    def format_logs_for_bedrock(self, log_events: LogEvents, hours_back: int) -> str:
         """Format log events into a readable format for Bedrock analysis"""
         if not log_events:
             return "No log events found in the specified time range."
         
-        # Sort by timestamp
-        sorted_logs = sorted(log_events, key=lambda x: x.get('timestamp', 0), reverse=True)
-        
-        # Limit to prevent token overflow (150 most recent events)
-        limited_logs = sorted_logs[:150]
+        timestamps = log_events.timestamps
+        messages = log_events.messages
+        event_types = log_events.log_types
         
         # Create summary statistics
-        total_events = len(log_events)
-        log_types = {}
+        log_types = Counter(event_types)
+        type_labels = {log_type: log_type.upper() for log_type in log_types}
+        
+        # Group repeated messages that only differ by IDs or timestamps
+        groups = defaultdict(list)
+        for i, message in enumerate(messages):
+            groups[(event_types[i], _VOLATILE_RE.sub('<ID>', message.strip()))].append(i)
+        
+        # (last_index, first_ts, count) per group, most recently seen first
+        summaries = []
+        for indices in groups.values():
+            last = max(indices, key=timestamps.__getitem__)
+            first_ts = min(timestamps[i] for i in indices)
+            summaries.append((last, first_ts, len(indices)))
+        summaries.sort(key=lambda summary: timestamps[summary[0]], reverse=True)
         
-        for event in log_events:
-            log_type = event.get('logType', 'unknown')
-            log_types[log_type] = log_types.get(log_type, 0) + 1
+        # Many events share a second, so each distinct second is formatted only once (in UTC,
+        # matching the retrieval window and CloudWatch)
+        fromtimestamp = datetime.fromtimestamp
+        stamp_cache = {}
+        
+        def stamp(timestamp: int) -> str:
+            second = timestamp // 1000
+            if second not in stamp_cache:
+                stamp_cache[second] = fromtimestamp(second, tz=timezone.utc).strftime(
+                    '%Y-%m-%d %H:%M:%S UTC')
+            return stamp_cache[second]
+        
+        # Greedily pack the most recent messages until the token budget is used up
+        # Room is left for the question and conversation history, which are trimmed to fit
+        budget = self.context_tokens - CONTEXT_TOKEN_RESERVE - CONVERSATION_TOKEN_BUDGET
+        entries = []
+        used_tokens = 0
+        
+        for last, first_ts, count in summaries:
+            last_stamp = stamp(timestamps[last])
+            repeats = ""
+            if count > 1:
+                repeats = f" [×{count} occurrences, first {stamp(first_ts)[11:]} last {last_stamp[11:]}]"
+            
+            entry = f"[{last_stamp}] [{type_labels[event_types[last]]}]{repeats}\n   {messages[last].strip()}\n\n"
+            used_tokens += _count_tokens(entry)
+            if used_tokens > budget:
+                break
+            entries.append(entry)
         
         # Build formatted output
-        formatted = f"=== EKS CLUSTER LOGS ANALYSIS ===\n"
-        formatted += f"Time Range: Last {hours_back} hours\n"
-        formatted += f"Total Events: {total_events}\n"
-        formatted += f"Log Types: {', '.join([f'{k}({v})' for k, v in log_types.items()])}\n"
-        formatted += f"\n=== DETAILED LOG EVENTS (Most Recent {len(limited_logs)}) ===\n\n"
-        
-        for idx, event in enumerate(limited_logs, 1):
-            timestamp = datetime.fromtimestamp(event.get('timestamp', 0) / 1000).strftime('%Y-%m-%d %H:%M:%S')
-            log_type = event.get('logType', 'unknown')
-            message = event.get('message', '').strip()
+        parts = [
+            "=== EKS CLUSTER LOGS ANALYSIS ===\n",
+            f"Time Range: Last {hours_back} hours\n",
+            f"Total Events: {len(log_events)}\n",
+            f"Log Types: {', '.join([f'{k}({v})' for k, v in log_types.items()])}\n",
+            f"Distinct Messages: {len(summaries)}\n",
+            f"\n=== DETAILED LOG EVENTS (Most Recent {len(entries)} Distinct) ===\n\n",
+        ]
+        parts.extend(f"{idx}. {entry}" for idx, entry in enumerate(entries, 1))
+        
+        return "".join(parts)
+    
+    def _disk_cache_file(self, key: tuple) -> Path:
+        """Path of the on-disk cache entry for a formatted log context"""
+        return CACHE_DIR / f"{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}.txt"
+    
+    def _read_disk_cache(self, key: tuple) -> Optional[str]:
+        """Return a cached formatted log context younger than FORMAT_CACHE_WINDOW, if any"""
+        cache_file = self._disk_cache_file(key)
+        try:
+            if time.time() - cache_file.stat().st_mtime > FORMAT_CACHE_WINDOW:
+                return None
+            return cache_file.read_text(encoding='utf-8')
+        except OSError:
+            return None
+    
+    def _write_disk_cache(self, key: tuple, formatted: str):
+        """Store a formatted log context readable only by the current user, pruning expired entries"""
+        try:
+            # The cache holds raw audit log content, so keep it private to the user
+            CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            os.chmod(CACHE_DIR, 0o700)
+            
+            now = time.time()
+            for old_file in CACHE_DIR.glob('*.txt'):
+                if now - old_file.stat().st_mtime > FORMAT_CACHE_WINDOW:
+                    old_file.unlink(missing_ok=True)
             
-            formatted += f"{idx}. [{timestamp}] [{log_type.upper()}]\n"
-            formatted += f"   {message[:500]}...\n\n" if len(message) > 500 else f"   {message}\n\n"
+            fd = os.open(self._disk_cache_file(key), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(formatted)
+        except OSError as e:
+            print(f"⚠️  Could not write log cache: {str(e)}")
+    
+    def format_cache_key(self, cluster_name: str, hours_back: int, log_types: List[str],
+                         filter_pattern: str = None) -> Optional[tuple]:
+        """Key a formatted log context on the request that produces it, bucketed by FORMAT_CACHE_WINDOW"""
+        if not self.use_cache:
+            return None
+        return (FORMAT_VERSION, cluster_name, hours_back, tuple(sorted(log_types or [])),
+                filter_pattern or '', int(time.time() // FORMAT_CACHE_WINDOW),
+                self.max_log_entries, self.context_tokens)
+    
+    def get_cached_formatted_logs(self, key: Optional[tuple]) -> Optional[str]:
+        """Return the formatted log context stored for a request key, before any logs are retrieved"""
+        if key is None:
+            return None
+        
+        if key in self._format_cache:
+            self._format_cache.move_to_end(key)
+            return self._format_cache[key]
         
+        formatted = self._read_disk_cache(key) if self.disk_cache else None
+        if formatted is not None:
+            self._remember_formatted_logs(key, formatted)
         return formatted
     
-    def ask_bedrock(self, context: str, question: str) -> str:
-        """Send a question to AWS Bedrock with log context"""
+    def _remember_formatted_logs(self, key: tuple, formatted: str):
+        """Keep a formatted log context in the in-memory LRU"""
+        self._format_cache[key] = formatted
+        if len(self._format_cache) > FORMAT_CACHE_SIZE:
+            self._format_cache.popitem(last=False)
+    
+    def get_formatted_logs(self, log_events: LogEvents, hours_back: int,
+                           key: Optional[tuple] = None) -> str:
+        """Format log events for Bedrock and store the result under a format_cache_key"""
+        formatted = self.format_logs_for_bedrock(log_events, hours_back)
+        if key is not None and log_events:
+            self._remember_formatted_logs(key, formatted)
+            if self.disk_cache:
+                self._write_disk_cache(key, formatted)
+        return formatted
+    
+    def _response_cache_key(self, system_prompt: str, question: str, history: str = "") -> str:
+        """Build the cache key for a Bedrock prompt"""
+        material = self.model_id + system_prompt + history + question
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def _get_cached_response(self, key: str) -> Tuple[Optional[str], bool]:
+        """Return (answer, is_fresh) for a cached Bedrock answer, or (None, False)"""
+        if not self.use_cache:
+            return None, False
+        
+        entry = None
+        if self._response_cache is not None:
+            try:
+                raw = self._response_cache.get(f"eks_log_analyzer:{key}")
+                if raw:
+                    cached = json.loads(raw)
+                    entry = (cached['t'], cached['a'])
+            except Exception as e:
+                print(f"⚠️  Response cache unavailable: {str(e)}")
+        else:
+            entry = self._local_responses.get(key)
+        
+        if entry is None:
+            return None, False
+        stored_at, answer = entry
+        return answer, time.time() - stored_at < RESPONSE_CACHE_TTL
+    
+    def _set_cached_response(self, key: str, answer: str):
+        """Store a Bedrock answer, keeping it around as a stale fallback after it expires"""
+        if not self.use_cache:
+            return
+        
+        if self._response_cache is not None:
+            try:
+                self._response_cache.set(
+                    f"eks_log_analyzer:{key}",
+                    json.dumps({'t': time.time(), 'a': answer}),
+                    ex=RESPONSE_CACHE_STALE_TTL
+                )
+            except Exception as e:
+                print(f"⚠️  Response cache unavailable: {str(e)}")
+        else:
+            self._local_responses[key] = (time.time(), answer)
+    
+    def _converse_stream(self, system: List[Dict], messages: List[Dict],
+                         emit: Callable[[str], None], max_tokens: int = 2000,
+                         temperature: float = 0.1) -> str:
+        """Run a Converse API call, passing each streamed text chunk to emit"""
+        response = self.bedrock_client.converse_stream(
+            modelId=self.model_id,
+            system=system,
+            messages=messages,
+            inferenceConfig={"maxTokens": max_tokens, "temperature": temperature}
+        )
+        
+        chunks = []
+        for event in response['stream']:
+            text = event.get('contentBlockDelta', {}).get('delta', {}).get('text')
+            if text:
+                chunks.append(text)
+                emit(text)
+        return "".join(chunks)
+    
+    def start_conversation(self, context: str):
+        """Begin a new conversation about a log context, discarding earlier turns"""
+        self._conversation = []
+        self._conversation_context = context
+    
+    def _trim_conversation(self, question: str):
+        """Drop the oldest turns until history plus question fit CONVERSATION_TOKEN_BUDGET"""
+        history_tokens = [
+            _count_tokens(message['content'][0]['text']) for message in self._conversation
+        ]
+        total = sum(history_tokens) + _count_tokens(question)
+        dropped = 0
+        # Remove whole user/assistant pairs so the history keeps alternating roles
+        while dropped < len(history_tokens) and total > CONVERSATION_TOKEN_BUDGET:
+            total -= history_tokens[dropped] + history_tokens[dropped + 1]
+            dropped += 2
+        if dropped:
+            del self._conversation[:dropped]
+    
+    def ask_bedrock(self, context: str, question: str,
+                    on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Send a question to AWS Bedrock with log context, streaming the answer to on_text"""
+        emit = on_text or (lambda text: None)
         system_prompt = f"""You are an expert Kubernetes and EKS cluster analyst. You have access to EKS cluster logs and can answer detailed questions about cluster activities, API requests, authentication, pod scheduling, and security events.
 
 {context}
 
 Provide specific, detailed answers based on the actual log data above. Reference specific timestamps, log types, and events in your responses. If you see patterns or anomalies, point them out."""
 
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2000,
-            "temperature": 0.1,
-            "system": system_prompt,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": question
-                }
-            ]
-        }
+        # Direct callers switching to different logs get a fresh conversation
+        if context != self._conversation_context:
+            self.start_conversation(context)
+        
+        system = [{"text": system_prompt}]
+        if self.prompt_caching:
+            # The log context is still sent on every call; the cache point lets Bedrock
+            # reuse the cached prefix, billed at the lower cached-input rate
+            system.append({"cachePoint": {"type": "default"}})
+        
+        user_message = {"role": "user", "content": [{"text": question}]}
+        self._trim_conversation(question)
+        
+        # Earlier turns change the answer, so they are part of the cache key
+        cache_key = self._response_cache_key(system_prompt, question, json.dumps(self._conversation))
+        cached, fresh = self._get_cached_response(cache_key)
+        if fresh:
+            self._conversation.extend([user_message, {"role": "assistant", "content": [{"text": cached}]}])
+            emit(cached)
+            return cached
         
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body),
-                contentType="application/json"
-            )
-            
-            response_body = json.loads(response['body'].read())
-            answer = response_body['content'][0]['text']
+            answer = self._converse_stream(system, self._conversation + [user_message], emit)
+            self._conversation.extend([user_message, {"role": "assistant", "content": [{"text": answer}]}])
+            self._set_cached_response(cache_key, answer)
             return answer
             
         except Exception as e:
-            return f"❌ Error calling Bedrock: {str(e)}\n\nMake sure you have:\n1. Enabled Claude 3 Sonnet in Bedrock Console\n2. Correct AWS credentials with bedrock:InvokeModel permission\n3. Using a supported region (us-east-1, us-west-2, eu-west-1)"
+            if cached:
+                print(f"⚠️  Bedrock call failed ({str(e)}); using a previously cached answer")
+                self._conversation.extend([user_message, {"role": "assistant", "content": [{"text": cached}]}])
+                emit(cached)
+                return cached
+            error = f"❌ Error calling Bedrock: {str(e)}\n\nMake sure you have:\n1. Enabled Claude 3 Sonnet in Bedrock Console\n2. Correct AWS credentials with bedrock:InvokeModelWithResponseStream permission\n3. Using a supported region (us-east-1, us-west-2, eu-west-1)"
+            emit(error)
+            return error
+    
+    def run_insights_query(self, cluster_name: str, query_string: str,
+                           hours_back: int) -> Optional[List[Dict[str, str]]]:
+        """Run a CloudWatch Logs Insights query on the cluster's log group
+        
+        Returns the result rows (possibly none), or None if the query could not be completed.
+        """
+        end_time = int(time.time())
+        start_time = end_time - hours_back * 3600
+        
+        try:
+            query_id = self.logs_client.start_query(
+                logGroupName=self.get_log_group_name(cluster_name),
+                startTime=start_time,
+                endTime=end_time,
+                queryString=query_string
+            )['queryId']
+            
+            deadline = time.monotonic() + INSIGHTS_QUERY_TIMEOUT
+            while True:
+                response = self.logs_client.get_query_results(queryId=query_id)
+                status = response.get('status')
+                if status == 'Complete':
+                    break
+                if status in ('Failed', 'Cancelled', 'Timeout', 'Unknown'):
+                    print(f"   ⚠️  Insights query {status.lower()}")
+                    return None
+                if time.monotonic() > deadline:
+                    self.logs_client.stop_query(queryId=query_id)
+                    print(f"   ⚠️  Insights query did not finish within {INSIGHTS_QUERY_TIMEOUT}s")
+                    return None
+                time.sleep(1)
+            
+            # Each row is a list of {field, value} cells; '@ptr' is an internal record pointer
+            return [
+                {cell['field']: cell.get('value', '') for cell in row if cell['field'] != '@ptr'}
+                for row in response.get('results', [])
+            ]
+            
+        except Exception as e:
+            print(f"   ⚠️  Error running Insights query: {str(e)}")
+            return None
     
-    def ask_general_eks_question(self, question: str, cluster_name: str = None) -> str:
-        """Ask general EKS questions without log context"""
+    def query_insights_for_question(self, cluster_name: str, question: str,
+                                    hours_back: int) -> Tuple[Optional[str], Optional[List[Dict[str, str]]]]:
+        """Have Bedrock translate a question into a Logs Insights query, then run it
+        
+        Returns (query, rows), with rows set to None if no query could be built or run.
+        """
+        system_prompt = """You translate questions about Amazon EKS control plane logs into CloudWatch Logs Insights queries.
+The log group contains streams named kube-apiserver-*, kube-apiserver-audit-*, authenticator-*, kube-controller-manager-* and kube-scheduler-*.
+Audit events are JSON with fields such as verb, user.username, sourceIPs.0, objectRef.resource, objectRef.namespace, objectRef.name and responseStatus.code.
+Use @timestamp, @message and @logStream where needed, and filter on @logStream to pick a log type.
+Respond with only the query text: no explanation and no code fences."""
+        
+        try:
+            query_string = _strip_code_fence(self._converse_stream(
+                [{"text": system_prompt}],
+                [{"role": "user", "content": [{"text": question}]}],
+                lambda text: None,
+                max_tokens=500,
+                temperature=0.0
+            ))
+        except Exception as e:
+            print(f"   ⚠️  Could not build an Insights query: {str(e)}")
+            return None, None
+        
+        if not query_string:
+            return None, None
+        
+        print(f"📊 Running CloudWatch Logs Insights query:\n   {query_string}")
+        rows = self.run_insights_query(cluster_name, query_string, hours_back)
+        if rows is not None:
+            print(f"   ✓ {len(rows)} result rows")
+        return query_string, rows
+    
+    def ask_bedrock_with_query_results(self, question: str, query_string: str,
+                                       rows: List[Dict[str, str]],
+                                       on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Answer a question from Logs Insights results instead of the raw log context"""
+        emit = on_text or (lambda text: None)
+        
+        fields = list(dict.fromkeys(name for row in rows for name in row))
+        table = "\n".join(
+            [" | ".join(fields)] +
+            [" | ".join(row.get(name, '') for name in fields) for row in rows[:INSIGHTS_MAX_ROWS]]
+        )
+        system_prompt = f"""You are an expert Kubernetes and EKS cluster analyst. The user's question was answered by running this CloudWatch Logs Insights query over the EKS cluster logs:
+
+{query_string}
+
+=== QUERY RESULTS ({len(rows)} rows) ===
+{table}
+
+Answer the question using these results. Quote the relevant numbers and point out notable patterns or anomalies."""
+        
+        user_message = {"role": "user", "content": [{"text": question}]}
+        self._trim_conversation(question)
+        try:
+            answer = self._converse_stream([{"text": system_prompt}], self._conversation + [user_message], emit)
+            # Keep the turn so follow-up questions on the raw logs can refer to it
+            self._conversation.extend([user_message, {"role": "assistant", "content": [{"text": answer}]}])
+            return answer
+        except Exception as e:
+            error = f"❌ Error calling Bedrock: {str(e)}"
+            emit(error)
+            return error
+    
+    def ask_general_eks_question(self, question: str, cluster_name: str = None,
+                                 on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Ask general EKS questions without log context, streaming the answer to on_text"""
+        emit = on_text or (lambda text: None)
         
         # Check if user is asking about their actual AWS resources
-        question_lower = question.lower()
-        if any(keyword in question_lower for keyword in ['my cluster', 'my eks', 'how many cluster', 'list cluster', 'number of cluster']):
+        if self._INTENT_RE.search(question):
             # Fetch actual AWS data
             clusters = self.list_clusters()
             aws_data = f"\n\n=== USER'S ACTUAL AWS RESOURCES ===\n"
@@ -318,35 +1125,43 @@ Provide detailed, practical answers about:
             ]
         }
         
+        cache_key = self._response_cache_key(context, question)
+        cached, fresh = self._get_cached_response(cache_key)
+        if fresh:
+            emit(cached)
+            return cached
+        
         try:
-            response = self.bedrock_client.invoke_model(
+            response = self.bedrock_client.invoke_model_with_response_stream(
                 modelId=self.model_id,
-                body=json.dumps(request_body),
+                body=_json_dumps(request_body),
                 contentType="application/json"
             )
             
-            response_body = json.loads(response['body'].read())
-            answer = response_body['content'][0]['text']
+            chunks = []
+            for event in response['body']:
+                chunk = _json_loads(event['chunk']['bytes']) if 'chunk' in event else {}
+                if chunk.get('type') == 'content_block_delta':
+                    text = chunk['delta'].get('text', '')
+                    chunks.append(text)
+                    emit(text)
+            
+            answer = "".join(chunks)
+            self._set_cached_response(cache_key, answer)
             return answer
             
         except Exception as e:
-            return f"❌ Error calling Bedrock: {str(e)}"
+            if cached:
+                print(f"⚠️  Bedrock call failed ({str(e)}); using a previously cached answer")
+                emit(cached)
+                return cached
+            error = f"❌ Error calling Bedrock: {str(e)}"
+            emit(error)
+            return error
     
     def interactive_general_mode(self, cluster_name: str = None):
         """Interactive Q&A for general EKS questions"""
-        print("\n" + "="*80)
-        print("🤖 EKS KNOWLEDGE ASSISTANT")
-        print("="*80)
-        print("\nAsk me anything about EKS and Kubernetes!")
-        print("\nExample questions:")
-        print("  • How do I troubleshoot pod crashes in EKS?")
-        print("  • What's the difference between EKS node groups and Fargate?")
-        print("  • How do I set up IRSA (IAM Roles for Service Accounts)?")
-        print("  • What are EKS best practices for security?")
-        print("  • How do I configure cluster autoscaling?")
-        print("  • Explain EKS networking and VPC CNI")
-        print("  • How do I upgrade my EKS cluster version?")
-        print("\nType 'exit' or 'quit' to end the session.\n")
+        sys.stdout.write(_GENERAL_MODE_BANNER)
         
         while True:
             try:
@@ -360,8 +1175,9 @@ Provide detailed, practical answers about:
                     continue
                 
                 print("\n🤔 Thinking...")
-                answer = self.ask_general_eks_question(question, cluster_name)
-                print(f"\n💡 Answer:\n{answer}")
+                print("\n💡 Answer:")
+                self.ask_general_eks_question(question, cluster_name, on_text=_print_streamed)
+                print()
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Session ended by user.")
@@ -369,22 +1185,13 @@ Provide detailed, practical answers about:
             except Exception as e:
                 print(f"\n❌ Error: {str(e)}")
     
-    def interactive_analysis(self, cluster_name: str, log_events: List[Dict], hours_back: int):
+    def interactive_analysis(self, cluster_name: str, formatted_logs: str, hours_back: int):
         """Interactive Q&A session about the logs"""
-        formatted_logs = self.format_logs_for_bedrock(log_events, hours_back)
         
-        print("\n" + "="*80)
-        print("🤖 INTERACTIVE EKS LOG ANALYSIS")
-        print("="*80)
-        print("\nYou can now ask questions about your EKS cluster logs!")
-        print("\nExample questions:")
-        print("  • What API requests do you see?")
-        print("  • Show me authentication failures")
-        print("  • Which users accessed the cluster?")
-        print("  • Are there any errors or warnings?")
-        print("  • What pods were created or deleted?")
-        print("  • Show me suspicious activities")
-        print("\nType 'exit' or 'quit' to end the session.\n")
+        # Every answer in this session, including Insights ones, shares one conversation
+        self.start_conversation(formatted_logs)
+        
+        sys.stdout.write(_ANALYSIS_BANNER)
         
         while True:
             try:
@@ -398,8 +1205,19 @@ Provide detailed, practical answers about:
                     continue
                 
                 print("\n🤔 Analyzing logs...")
-                answer = self.ask_bedrock(formatted_logs, question)
-                print(f"\n💡 Answer:\n{answer}")
+                
+                # Aggregations are pushed down to CloudWatch Logs Insights when possible
+                query_string, rows = None, None
+                if self._AGGREGATION_RE.search(question):
+                    query_string, rows = self.query_insights_for_question(cluster_name, question, hours_back)
+                
+                # Zero rows is still an answer; only a failed query falls back to the raw logs
+                print("\n💡 Answer:")
+                if rows is not None:
+                    self.ask_bedrock_with_query_results(question, query_string, rows, on_text=_print_streamed)
+                else:
+                    self.ask_bedrock(formatted_logs, question, on_text=_print_streamed)
+                print()
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Session ended by user.")
@@ -414,7 +1232,7 @@ Provide detailed, practical answers about:
         print("📊 EKS CLUSTER INFORMATION")
         print("="*80)
         
-        clusters = self.list_clusters()
+        clusters = self.prefetched_clusters()
         
         print(f"\n🌍 Region: {self.region_name}")
         print(f"📦 Total EKS Clusters: {len(clusters)}")
@@ -429,21 +1247,28 @@ Provide detailed, practical answers about:
         print(f"\n{'#':<5} {'Cluster Name':<30} {'Status':<15} {'Version':<10}")
         print("-" * 80)
         
-        for idx, cluster_name in enumerate(clusters, 1):
+        def describe(cluster_name: str):
             try:
-                response = self.eks_client.describe_cluster(name=cluster_name)
-                cluster_data = response['cluster']
-                
-                status = cluster_data.get('status', 'UNKNOWN')
-                version = cluster_data.get('version', 'N/A')
-                
-                # Status emoji
-                status_emoji = "✅" if status == "ACTIVE" else "⚠️"
-                
-                print(f"{idx:<5} {cluster_name:<30} {status_emoji} {status:<13} {version:<10}")
-                
+                return self._describe_cluster(cluster_name), None
             except Exception as e:
-                print(f"{idx:<5} {cluster_name:<30} ❌ Error: {str(e)[:20]}")
+                return None, e
+        
+        # Describe all clusters in parallel, then print in listing order
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(describe, clusters))
+        
+        for idx, (cluster_name, (cluster_data, error)) in enumerate(zip(clusters, results), 1):
+            if error:
+                print(f"{idx:<5} {cluster_name:<30} ❌ Error: {str(error)[:20]}")
+                continue
+            
+            status = cluster_data.get('status', 'UNKNOWN')
+            version = cluster_data.get('version', 'N/A')
+            
+            # Status emoji
+            status_emoji = "✅" if status == "ACTIVE" else "⚠️"
+            
+            print(f"{idx:<5} {cluster_name:<30} {status_emoji} {status:<13} {version:<10}")
         
         print("\n" + "="*80)
         print("💡 Tip: Use Mode 1 to analyze logs or Mode 2 to ask questions about these clusters")
@@ -452,19 +1277,28 @@ Provide detailed, practical answers about:
 
 def main():
     """Main function to run the EKS Log Analyzer"""
-    print("\n" + "="*80)
-    print("🚀 EKS LOG ANALYZER WITH AWS BEDROCK")
-    print("="*80)
+    parser = argparse.ArgumentParser(description="Analyze EKS cluster logs with AWS Bedrock")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Don't reuse or store formatted logs or Bedrock answers")
+    parser.add_argument('--disk-cache', action='store_true',
+                        help=f"Also keep formatted logs in {CACHE_DIR} (user-only) so the same "
+                             f"analysis rerun within {FORMAT_CACHE_WINDOW // 60} minutes skips retrieval")
+    args = parser.parse_args()
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    sys.stdout.write(_MAIN_BANNER)
     
+    analyzer = None
     try:
-        # Initialize analyzer
-        analyzer = EKSLogAnalyzer()
+        # Initialize analyzer, prefetching clusters while the menu is shown
+        analyzer = EKSLogAnalyzer(use_cache=not args.no_cache, prefetch=True,
+                                  disk_cache=args.disk_cache)
         
         # Ask user what they want to do
-        print("\n📋 What would you like to do?")
-        print("   1. Analyze EKS cluster logs (retrieve and analyze actual logs)")
-        print("   2. Ask general EKS questions (knowledge assistant)")
-        print("   3. Show my cluster information (quick view)")
+        sys.stdout.write(_MODE_MENU)
         
         mode = input("\nEnter your choice (1, 2, or 3): ").strip()
         
@@ -479,7 +1313,7 @@ def main():
             
             # Optionally get cluster context
             print("\n📋 Available EKS clusters:")
-            clusters = analyzer.list_clusters()
+            clusters = analyzer.prefetched_clusters()
             if clusters:
                 for idx, cluster in enumerate(clusters, 1):
                     print(f"   {idx}. {cluster}")
@@ -496,7 +1330,7 @@ def main():
         # Mode 1: Log analysis
         # List available clusters
         print("\n📋 Available EKS clusters:")
-        clusters = analyzer.list_clusters()
+        clusters = analyzer.prefetched_clusters()
         if clusters:
             for idx, cluster in enumerate(clusters, 1):
                 print(f"   {idx}. {cluster}")
@@ -533,24 +1367,39 @@ def main():
         if not logging_enabled:
             return
         
+        # Look up log streams while the user picks a time range
+        analyzer.prefetch_log_streams(cluster_name, log_types)
+        
         # Get time range
         print("\n⏰ How many hours of logs do you want to analyze?")
         hours_input = input("   Hours (default: 24): ").strip()
         hours_back = int(hours_input) if hours_input else 24
         
-        # Retrieve logs
-        print(f"\n📥 Retrieving logs for the last {hours_back} hours...")
-        log_events = analyzer.retrieve_logs(cluster_name, hours_back, log_types)
+        # Optional server-side filter, e.g. { $.responseStatus.code >= 400 }
+        print("\n🔎 CloudWatch filter pattern to narrow the logs (optional)")
+        filter_input = input("   Pattern (default: all events): ").strip()
+        filter_pattern = filter_input if filter_input else None
         
-        if not log_events:
-            print("\n⚠️  No logs found. This could mean:")
-            print("   • Logging was recently enabled (wait 5-10 minutes)")
-            print("   • No activity in the specified time range")
-            print("   • Logs are being sent to S3 instead of CloudWatch")
-            return
+        # Reuse the logs from an identical recent request, otherwise retrieve them
+        cache_key = analyzer.format_cache_key(cluster_name, hours_back, log_types, filter_pattern)
+        formatted_logs = analyzer.get_cached_formatted_logs(cache_key)
+        if formatted_logs is not None:
+            print(f"\n♻️  Reusing logs retrieved in the last {FORMAT_CACHE_WINDOW // 60} minutes")
+        else:
+            print(f"\n📥 Retrieving logs for the last {hours_back} hours...")
+            log_events = analyzer.retrieve_logs(cluster_name, hours_back, log_types, filter_pattern)
+            
+            if not log_events:
+                print("\n⚠️  No logs found. This could mean:")
+                print("   • Logging was recently enabled (wait 5-10 minutes)")
+                print("   • No activity in the specified time range")
+                print("   • Logs are being sent to S3 instead of CloudWatch")
+                return
+            
+            formatted_logs = analyzer.get_formatted_logs(log_events, hours_back, cache_key)
         
         # Start interactive analysis
-        analyzer.interactive_analysis(cluster_name, log_events, hours_back)
+        analyzer.interactive_analysis(cluster_name, formatted_logs, hours_back)
         
     except KeyboardInterrupt:
         print("\n\n👋 Analyzer stopped by user.")
@@ -558,6 +1407,9 @@ def main():
         print(f"\n❌ Unexpected error: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        if analyzer is not None:
+            analyzer.close()
 
 
 if __name__ == "__main__":